@@ -1,54 +1,158 @@
+import base64
+import gzip
+import hashlib
+import json
 import os
 import random
-from typing import List, Dict, Optional, Set
+import re
+import threading
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 
 import requests
-from flask import Flask, Response, jsonify, render_template, request
-from time import time
-from collections import defaultdict, deque
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, Response, render_template, request
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
 
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# orjson works on bytes both ways; the stdlib fallback accepts and produces bytes too
+if orjson is not None:
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj: object) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
+
+# No upstream format/size filter: 100-card decks of any format are wanted, and
+# _commander_decks drops everything else as each page is ingested
 ARCHIDEKT_USER_URL = "https://archidekt.com/api/decks/v3/?ownerUsername={username}"
 ARCHIDEKT_DECK_URL = "https://archidekt.com/decks/{id}"
+REQUEST_HEADERS = {
+    "User-Agent": "preconceive/1.0 (https://github.com/jarnr/preconceive)",
+    "Accept": "application/json",
+}
+MAX_PAGES = 10
+FETCH_WORKERS = 8
+# The only deck fields the app reads; everything else in the API payload is dropped at ingest
+DECK_FIELDS = ("id", "name", "featured", "colors", "size")
+# One bit per color so a deck's color identity fits in a 5-bit int
+COLOR_BITS = {"W": 1, "U": 2, "B": 4, "R": 8, "G": 16}
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+# naive extraction of inline <script>...</script> blocks
+_SCRIPT_RE = re.compile(r"<script>([\s\S]*?)</script>", re.IGNORECASE)
+GZIP_MIN_SIZE = 512  # bytes; smaller bodies aren't worth compressing
+GZIP_LEVEL = 6  # zlib's usual speed/size tradeoff; 9 costs far more CPU for a few bytes
 ALLOWED_USERS = ["Archidekt_Precons", "jarnr", "pertrick", "Bowden1337", "jden007", "tolariancommunitycollege"]
 
 
-def fetch_all_decks(start_url: str) -> List[Dict]:
-    """Fetch all decks from Archidekt, following pagination.
+def _build_session() -> requests.Session:
+    """Shared session so page fetches reuse pooled keep-alive connections."""
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    retries = Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS, max_retries=retries))
+    return session
 
-    The API is expected to return JSON with either a 'results' or 'decks' list
-    and a 'next' URL for pagination.
-    """
-    decks: List[Dict] = []
-    url: Optional[str] = start_url
-    headers = {
-        "User-Agent": "preconceive/1.0 (https://github.com/jarnr/preconceive)",
-        "Accept": "application/json",
-    }
 
-    i = 0
-    while url:
-        resp = requests.get(url, headers=headers, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+_SESSION = _build_session()
 
-        page_decks = data.get("results", [])
 
-        if page_decks:
-            decks.extend(page_decks)
+def _fetch_page(url: str) -> Dict:
+    resp = _SESSION.get(url, timeout=15)
+    resp.raise_for_status()
+    try:
+        return json_loads(resp.content)
+    except ValueError as err:
+        # Keep surfacing bad bodies as a RequestException, like resp.json() did
+        raise requests.exceptions.InvalidJSONError(err, response=resp) from err
 
-        url = data.get("next", None)
-        i += 1
-        if i > 10:
+
+def _commander_decks(page: Dict) -> List[Dict]:
+    """Copy just DECK_FIELDS out of a page's 100-card decks, tagging each with its color mask, URL and /pick payload."""
+    decks: List[Dict] = []
+    for raw in page.get("results", []):
+        if raw['size'] != 100:
+            continue
+        deck = {key: raw[key] for key in DECK_FIELDS if key in raw}
+        deck["_mask"] = extract_color_mask(deck)
+        deck["_url"] = build_deck_url(raw)
+        deck["_payload"] = deck_payload(deck)
+        decks.append(deck)
+    return decks
+
+
+def _fetch_commander_decks(url: str) -> List[Dict]:
+    return _commander_decks(_fetch_page(url))
+
+
+def _follow_next(data: Dict) -> List[Dict]:
+    """Walk 'next' links serially from an already fetched first page."""
+    decks = _commander_decks(data)
+    url: Optional[str] = data.get("next")
+    i = 1
+    while url:
+        if i >= MAX_PAGES:
             logger.warning(f"Too many pages: {i}")
             logger.warning(f"URL: {url}")
             break
+        data = _fetch_page(url)
+        decks.extend(_commander_decks(data))
+        url = data.get("next")
+        i += 1
+    return decks
+
+
+def fetch_all_decks(start_url: str) -> List[Dict]:
+    """Fetch all decks from Archidekt, following pagination.
+
+    The API is expected to return JSON with a 'results' list and a 'count' of
+    decks in total. The first page tells us the page size, after which the
+    remaining pages are requested concurrently.
+
+    Every page is needed, even though /pick returns a single deck: the color
+    filter and the size check both have to see the whole list before a deck
+    can be chosen uniformly, and the result is cached per user anyway.
+    """
+    data = _fetch_page(start_url)
+    if not data.get("next"):
+        return _commander_decks(data)
+
+    page_size = len(data.get("results", []))
+    try:
+        last_page = -(-int(data["count"]) // page_size)
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        last_page = 0
+    if last_page < 2:
+        # 'next' says there is more, but the count can't tell us how much
+        logger.warning(f"No usable deck count, following pages one by one: {start_url}")
+        return _follow_next(data)
+    if last_page > MAX_PAGES:
+        logger.warning(f"Too many pages: {last_page}")
+        logger.warning(f"URL: {start_url}")
+        last_page = MAX_PAGES
+    urls = [f"{start_url}&page={i}" for i in range(2, last_page + 1)]
+
+    # Workers decode and ingest their own page, so parsing overlaps the other
+    # requests still in flight; page 1 is ingested here while they run
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(urls))) as pool:
+        pages = pool.map(_fetch_commander_decks, urls)
+        decks: List[Dict] = _commander_decks(data)
+        for page_decks in pages:
+            decks.extend(page_decks)
 
-    return [deck for deck in decks if deck['size'] == 100]
+    return decks
 
 
 def build_deck_url(deck: Dict) -> Optional[str]:
@@ -58,25 +162,94 @@ def build_deck_url(deck: Dict) -> Optional[str]:
     return ARCHIDEKT_DECK_URL.format(id=deck_id)
 
 
+def deck_payload(deck: Dict) -> Optional[bytes]:
+    """Serialize the /pick response body for a deck, or None if it has no URL."""
+    deck_url = deck.get("_url")
+    if not deck_url:
+        return None
+
+    deck_title = (deck.get("name") or "").replace(" - jarcon", "").strip()
+    if not deck_title:
+        deck_title = "Deck Name Not Found"
+
+    return json_dumps({
+        "url": deck_url,
+        "title": deck_title,
+        "image": deck.get("featured", None),
+        "colors": order_mask(extract_color_mask(deck)),
+    })
+
+
+# Byte -> color bit, either case; every other byte maps to 0
+_BYTE_TO_BIT = bytearray(256)
+for _letter, _bit in COLOR_BITS.items():
+    _BYTE_TO_BIT[ord(_letter)] = _BYTE_TO_BIT[ord(_letter.lower())] = _bit
+
+
+# str.translate table deleting color letters; anything left over is not a color
+_STRIP_COLORS = str.maketrans("", "", "WUBRG")
+
+
+def color_mask(colors: Iterable[str]) -> int:
+    """Fold color letters into a COLOR_BITS mask; characters other than W/U/B/R/G are ignored."""
+    mask = 0
+    for b in "".join(colors).encode():
+        mask |= _BYTE_TO_BIT[b]
+    return mask
+
+
+def extract_color_mask(deck: Dict) -> int:
+    """COLOR_BITS mask of the colors with a positive count in deck['colors']."""
+    colors_dict = deck.get("colors")
+    if not isinstance(colors_dict, dict):
+        return 0
+    mask = 0
+    for key, count in colors_dict.items():
+        bit = COLOR_BITS.get(key)
+        if not bit or not count:
+            continue
+        try:
+            if int(count) > 0:
+                mask |= bit
+        except (TypeError, ValueError):
+            continue
+    return mask
+
+
 def extract_colors_raw(deck: Dict) -> List[str]:
     """Extract raw color letters; optimized for deck['colors'] dict shape.
 
     Returns a list of unique uppercase letters among W, U, B, R, G.
     """
-    colors_dict = deck.get("colors")
-    if isinstance(colors_dict, dict):
-        ordered_keys = ["W", "U", "B", "R", "G"]
-        result = []
-        for key in ordered_keys:
-            try:
-                count = int(colors_dict.get(key, 0))
-            except (TypeError, ValueError):
-                count = 0
-            if count > 0:
-                result.append(key)
-        if result:
-            return result
-    return []
+    mask = extract_color_mask(deck)
+    return [c for c, bit in COLOR_BITS.items() if mask & bit]
+
+
+# Predefined orders for 2/3/4 colors; single colors and WUBRG order themselves
+ORDER2 = ("WU", "UB", "BR", "RG", "GW", "WB", "UR", "BG", "RW", "GU")
+ORDER3 = ("WUB", "UBR", "BRG", "RGW", "GWU", "WBG", "URW", "BGU", "RWB", "GUR")
+ORDER4 = ("WUBR", "UBRG", "BRGW", "RGWU", "GWUB")
+
+
+def _build_order_table() -> Dict[int, str]:
+    """Ordered letters for every one of the 32 color masks."""
+    table: Dict[int, str] = {0: ""}
+    for seq in ("W", "U", "B", "R", "G", *ORDER2, *ORDER3, *ORDER4, "WUBRG"):
+        table[color_mask(seq)] = seq
+    for mask in range(32):
+        if mask not in table:
+            # Fallback: base WUBRG order filtered by presence
+            logger.warning(f"Fallback: {mask:05b}")
+            table[mask] = "".join(c for c, bit in COLOR_BITS.items() if mask & bit)
+    return table
+
+
+_ORDER_BY_MASK = _build_order_table()
+
+
+def order_mask(mask: int) -> List[str]:
+    """Ordered color letters for a COLOR_BITS mask."""
+    return list(_ORDER_BY_MASK[mask])
 
 
 def order_colors(colors: List[str]) -> List[str]:
@@ -84,84 +257,151 @@ def order_colors(colors: List[str]) -> List[str]:
 
     If a specific 2/3/4 ordering is provided, use that; otherwise fallback to W,U,B,R,G order filtered by presence.
     """
-    base_order = ["W", "U", "B", "R", "G"]
-    color_set = set(colors)
-    if not color_set:
+    return order_mask(color_mask(colors))
+
+
+def group_by_mask(decks: List[Dict]) -> Dict[int, List[Optional[bytes]]]:
+    """Group the decks' /pick payloads by color mask, so filtering scans at most 32 buckets."""
+    by_mask: Dict[int, List[Optional[bytes]]] = {}
+    for deck in decks:
+        by_mask.setdefault(deck["_mask"], []).append(deck["_payload"])
+    return by_mask
+
+
+def choose_payload(buckets: List[List[Optional[bytes]]]) -> Optional[bytes]:
+    """Pick uniformly among all payloads in the given buckets without concatenating them."""
+    i = random.randrange(sum(len(bucket) for bucket in buckets))
+    for bucket in buckets:
+        if i < len(bucket):
+            return bucket[i]
+        i -= len(bucket)
+    return None
+
+
+def inline_script_hashes() -> List[str]:
+    """CSP hashes of index.html's inline scripts."""
+    try:
+        with open(TEMPLATE_PATH, "rb") as f:
+            content = f.read()
+        text = content.decode("utf-8", errors="ignore")
+        hashes: List[str] = []
+        for s in _SCRIPT_RE.findall(text):
+            # CSP hash over the exact script bytes
+            digest = hashlib.sha256(s.encode("utf-8")).digest()
+            b64 = base64.b64encode(digest).decode("ascii")
+            hashes.append(f"'sha256-{b64}'")
+        return hashes
+    except Exception:
+        logger.exception("Failed computing inline script hashes")
         return []
 
-    # Predefined orders
-    order2 = [
-        "WU", "UB", "BR", "RG", "GW", "WB", "UR", "BG", "RW", "GU",
-    ]
-    order3 = [
-        "WUB", "UBR", "BRG", "RGW", "GWU", "WBG", "URW", "BGU", "RWB", "GUR",
-    ]
-    order4 = [
-        "WUBR", "UBRG", "BRGW", "RGWU", "GWUB",
-    ]
-
-    def pick_from_orders(target_set: set, sequences: List[str]) -> Optional[List[str]]:
-        for seq in sequences:
-            if set(seq) == target_set:
-                return list(seq)
-        return None
-
-    if len(color_set) == 1:
-        return [next(iter(color_set))]
-    if len(color_set) == 2:
-        picked = pick_from_orders(color_set, order2)
-        if picked:
-            return picked
-    if len(color_set) == 3:
-        picked = pick_from_orders(color_set, order3)
-        if picked:
-            return picked
-    if len(color_set) == 4:
-        picked = pick_from_orders(color_set, order4)
-        if picked:
-            return picked
-    if len(color_set) == 5:
-        return list("WUBRG")
-
-    # Fallback: base WUBRG order filtered by presence
-    logger.warning(f"Fallback: {color_set}")
-    return [c for c in base_order if c in color_set]
-
 
 def create_app() -> Flask:
     app = Flask(__name__)
 
     # Simple in-memory cache and rate limiters
     cache_by_user: Dict[str, Dict[str, object]] = {}
+    fetch_locks: Dict[str, threading.Lock] = {u: threading.Lock() for u in ALLOWED_USERS}
+    failed_at: Dict[str, float] = {}  # monotonic time of each user's last failed fetch
     CACHE_TTL_SECONDS = 300  # 5 minutes
+    CACHE_MAX_AGE_SECONDS = 3600  # keep serving stale decks this long while Archidekt is failing
+    FETCH_BACKOFF_SECONDS = 30  # don't retry a failed fetch sooner than this
 
-    requests_by_ip: Dict[str, deque] = defaultdict(deque)
+    # Token bucket per IP: (tokens left, time of last refill)
+    buckets_by_ip: Dict[str, Tuple[float, float]] = {}
+    buckets_lock = threading.Lock()
+    last_bucket_gc = monotonic()
     RATE_LIMIT_WINDOW = 60  # seconds
     RATE_LIMIT_MAX = 30     # requests per window
+    RATE_LIMIT_REFILL = RATE_LIMIT_MAX / RATE_LIMIT_WINDOW  # tokens per second
+
+    def allow_request(ip: str, now: float) -> bool:
+        nonlocal last_bucket_gc
+        with buckets_lock:
+            if now - last_bucket_gc > RATE_LIMIT_WINDOW:
+                # A bucket idle for a whole window is full again, same as a missing one
+                stale = [k for k, (_, last) in buckets_by_ip.items() if now - last >= RATE_LIMIT_WINDOW]
+                for k in stale:
+                    del buckets_by_ip[k]
+                last_bucket_gc = now
+
+            tokens, last = buckets_by_ip.get(ip, (RATE_LIMIT_MAX, now))
+            tokens = min(RATE_LIMIT_MAX, tokens + (now - last) * RATE_LIMIT_REFILL)
+            if tokens < 1:
+                buckets_by_ip[ip] = (tokens, now)
+                return False
+            buckets_by_ip[ip] = (tokens - 1, now)
+            return True
+
+    INLINE_SCRIPT_HASHES = inline_script_hashes()
+
+    def _refresh_decks(username: str) -> Dict[int, List[Optional[bytes]]]:
+        try:
+            by_mask = group_by_mask(fetch_all_decks(ARCHIDEKT_USER_URL.format(username=username)))
+        except requests.RequestException:
+            failed_at[username] = monotonic()
+            raise
+        cache_by_user[username] = {"by_mask": by_mask, "ts": monotonic()}
+        return by_mask
 
-    # Compute inline script hashes from index.html
-    def _compute_inline_script_hashes() -> List[str]:
+    def _background_refresh(username: str) -> None:
+        # Runs with fetch_locks[username] already held by the caller
         try:
-            here = os.path.dirname(os.path.abspath(__file__))
-            template_path = os.path.join(here, "templates", "index.html")
-            with open(template_path, "rb") as f:
-                content = f.read()
-            # naive extraction of inline <script>...</script> blocks
-            import re, hashlib, base64
-            text = content.decode("utf-8", errors="ignore")
-            scripts = re.findall(r"<script>([\s\S]*?)</script>", text, re.IGNORECASE)
-            hashes: List[str] = []
-            for s in scripts:
-                # CSP hash over the exact script bytes
-                digest = hashlib.sha256(s.encode("utf-8")).digest()
-                b64 = base64.b64encode(digest).decode("ascii")
-                hashes.append(f"'sha256-{b64}'")
-            return hashes
+            _refresh_decks(username)
+        except requests.RequestException:
+            logger.exception("Background refresh failed")
+        finally:
+            fetch_locks[username].release()
+
+    def _start_background_refresh(username: str, now: float) -> None:
+        if now - failed_at.get(username, float("-inf")) < FETCH_BACKOFF_SECONDS:
+            return
+        lock = fetch_locks[username]
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=_background_refresh, args=(username,), daemon=True).start()
         except Exception:
-            logger.exception("Failed computing inline script hashes")
-            return []
-
-    INLINE_SCRIPT_HASHES = _compute_inline_script_hashes()
+            lock.release()
+            logger.exception("Could not start background refresh")
+
+    def _usable(username: str, cached: Dict[str, object], now: float) -> bool:
+        """Fresh, or stale but under the max age with a refresh failing since it was stored."""
+        age = now - cached["ts"]  # type: ignore[operator]
+        if age < CACHE_TTL_SECONDS:
+            return True
+        return age < CACHE_MAX_AGE_SECONDS and failed_at.get(username, float("-inf")) > cached["ts"]  # type: ignore[operator]
+
+    def get_decks(username: str) -> Dict[int, List[Optional[bytes]]]:
+        """Return username's deck payloads grouped by color mask, fetching only when the cache is cold or expired.
+
+        Entries past half their TTL are refreshed on a daemon thread so requests keep
+        serving from memory; at most one fetch per user is in flight at a time. If
+        Archidekt is failing, the last good entry is served up to CACHE_MAX_AGE_SECONDS
+        and fetches are not retried within FETCH_BACKOFF_SECONDS of a failure.
+        """
+        now = monotonic()
+        cached = cache_by_user.get(username)
+        if cached and _usable(username, cached, now):
+            if now - cached["ts"] > CACHE_TTL_SECONDS / 2:  # type: ignore[operator]
+                _start_background_refresh(username, now)
+            return cached["by_mask"]  # type: ignore[return-value]
+
+        with fetch_locks[username]:
+            # Another thread may have fetched, or failed to, while we waited
+            now = monotonic()
+            cached = cache_by_user.get(username)
+            if cached and _usable(username, cached, now):
+                return cached["by_mask"]  # type: ignore[return-value]
+            if now - failed_at.get(username, float("-inf")) < FETCH_BACKOFF_SECONDS:
+                raise requests.RequestException(f"Fetching decks for {username} failed recently")
+            try:
+                return _refresh_decks(username)
+            except requests.RequestException:
+                if cached and now - cached["ts"] < CACHE_MAX_AGE_SECONDS:  # type: ignore[operator]
+                    logger.exception("Refresh failed, serving stale decks")
+                    return cached["by_mask"]  # type: ignore[return-value]
+                raise
 
     @app.get("/")
     def root() -> Response:
@@ -171,36 +411,24 @@ def create_app() -> Flask:
     def pick() -> Response:
         # Rate limiting per IP
         ip = request.headers.get('X-Forwarded-For', request.remote_addr) or 'unknown'
-        now = time()
-        q = requests_by_ip[ip]
-        while q and (now - q[0]) > RATE_LIMIT_WINDOW:
-            q.popleft()
-        if len(q) >= RATE_LIMIT_MAX:
+        if not allow_request(ip, monotonic()):
             return Response("Too many requests", status=429, mimetype="text/plain")
-        q.append(now)
 
         username = request.args.get("username", "Archidekt_Precons").strip()
         if not username in ALLOWED_USERS:
             return Response("username is invalid", status=400, mimetype="text/plain")
-        api_url = ARCHIDEKT_USER_URL.format(username=username)
 
         filter_type = request.args.get("filter_type", "subset").lower()
         if filter_type not in {"exact", "subset"}:
             return Response("filter_type is invalid", status=400, mimetype="text/plain")
 
-        colors = set(request.args.get("colors", "WUBRG").upper())
-        for c in colors:
-            if c not in {"W","U","B","R","G"}:
-                return Response("colors is invalid", status=400, mimetype="text/plain")
-            
+        colors = request.args.get("colors", "WUBRG").upper()
+        if colors.translate(_STRIP_COLORS):
+            return Response("colors is invalid", status=400, mimetype="text/plain")
+        wanted = color_mask(colors)
+
         try:
-            # Cache decks by username
-            cached = cache_by_user.get(username)
-            if cached and (now - cached.get("ts", 0)) < CACHE_TTL_SECONDS:
-                all_decks = cached["decks"]  # type: ignore[index]
-            else:
-                all_decks = fetch_all_decks(api_url)
-                cache_by_user[username] = {"decks": all_decks, "ts": now}
+            by_mask = get_decks(username)
         except requests.HTTPError as http_err:
             logger.exception("Upstream HTTP error")
             return Response("Upstream error", status=502, mimetype="text/plain")
@@ -208,37 +436,42 @@ def create_app() -> Flask:
             logger.exception("Upstream request error")
             return Response("Upstream error", status=502, mimetype="text/plain")
 
-        if not all_decks:
+        if not by_mask:
             return Response("No decks found", status=404, mimetype="text/plain")
 
         # filter by allowed colors: remove decks containing any unselected color
-        def deck_colors(deck: Dict) -> List[str]:
-            return order_colors(extract_colors_raw(deck))
-
         if filter_type == "exact":
-            filtered = [d for d in all_decks if set(deck_colors(d)) == set(colors)]
+            buckets = [by_mask[wanted]] if wanted in by_mask else []
         else:
-            filtered = [d for d in all_decks if set(deck_colors(d)).issubset(colors)]
-        decks_pool = filtered if filtered else all_decks
+            buckets = [bucket for mask, bucket in by_mask.items() if not mask & ~wanted]
+        if not buckets:
+            buckets = list(by_mask.values())
 
-        chosen = random.choice(decks_pool)
-        deck_url = build_deck_url(chosen)
-        if not deck_url:
+        payload = choose_payload(buckets)
+        if payload is None:
             return Response("Chosen deck missing id", status=500, mimetype="text/plain")
 
-        deck_title = chosen.get("name", "").replace(" - jarcon", "").strip()
-        if not deck_title:
-            deck_title = "Deck Name Not Found"
-        
-        image_url = chosen.get("featured", None)
-        colors_ordered = deck_colors(chosen)
+        # Body was serialized once when the deck was cached
+        resp = Response(payload, mimetype="application/json")
+        # Each pick is random, so never reuse it; the ETag still lets proxies collapse duplicates
+        resp.headers["Cache-Control"] = "no-store"
+        resp.add_etag(weak=True)
+        return resp
 
-        return jsonify({
-            "url": deck_url,
-            "title": deck_title,
-            "image": image_url,
-            "colors": colors_ordered,
-        })
+    @app.after_request
+    def compress_response(resp: Response) -> Response:
+        if resp.direct_passthrough or resp.status_code != 200 or "Content-Encoding" in resp.headers:
+            return resp
+        body = resp.get_data()
+        if len(body) < GZIP_MIN_SIZE:
+            return resp
+        # The body depends on Accept-Encoding whether or not this client gets gzip
+        resp.vary.add("Accept-Encoding")
+        if request.accept_encodings.quality("gzip") <= 0:
+            return resp
+        resp.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        resp.headers["Content-Encoding"] = "gzip"
+        return resp
 
     @app.after_request
     def set_security_headers(resp: Response) -> Response:
@@ -268,5 +501,6 @@ app = create_app()
 
 
 if __name__ == "__main__":
+    # Development server only; deploy with `gunicorn -c gunicorn_conf.py app:app`
     port = int(os.environ.get("PORT", "5000"))
     app.run(host="0.0.0.0", port=port, debug=False)
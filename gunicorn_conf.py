@@ -0,0 +1,19 @@
+"""Gunicorn settings: `gunicorn -c gunicorn_conf.py app:app`."""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+
+# Threaded workers keep answering /pick from the cache while a deck refresh
+# waits on Archidekt. Set GUNICORN_WORKER_CLASS=gevent (with gevent installed)
+# to use greenlets instead; worker_connections only applies to that mode.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "200"))
+
+timeout = 60
+
+# Importing the app in the master lets threaded workers share the module, but
+# gevent must monkey-patch ssl/threading before app.py is imported, so only
+# preload for gthread
+preload_app = worker_class == "gthread"